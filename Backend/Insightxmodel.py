@@ -6,19 +6,29 @@ Supports TWO AI providers:
   2. Anthropic  → Claude             (api.anthropic.com)
 
 REQUIREMENTS:  pip install openai pandas rich python-dotenv
+  optional:    pip install pyarrow     (faster CSV loading)
+               pip install tiktoken    (exact token budgeting of chat history)
+               pip install anthropic   (--batch with Anthropic)
+               pip install sentence-transformers   (reuse answers for near-duplicate questions)
 
 QUICK START:
   python insightx_ai.py my_data.csv --provider nvidia
   python insightx_ai.py my_data.csv --provider anthropic
+  python insightx_ai.py my_data.csv -q "Top risks?" -q "Fraud by state?"   ← concurrent, non-interactive
+  python insightx_ai.py my_data.csv -q "Top risks?" --batch                ← provider Batch API
 
 .env file:
   NVIDIA_API_KEY=nvapi-...
   ANTHROPIC_API_KEY=sk-ant-...
 """
 
-import os, sys, json, argparse
+from __future__ import annotations
+
+import os, re, sys, json, argparse, asyncio, hashlib, importlib.util, warnings, random, time
 from pathlib import Path
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 
 try:
     from dotenv import load_dotenv
@@ -26,26 +36,49 @@ try:
 except ImportError:
     pass  # .env optional
 
-try:
-    import pandas as pd
-except ImportError:
-    sys.exit("❌  pip install pandas")
+# Heavy imports (pandas, numpy, openai, pyarrow, rich …) are deferred to first use
+# so `--help` and argument errors return immediately. Optional packages are only
+# looked up here, not imported.
+def _has(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
 
-try:
-    from openai import OpenAI
-except ImportError:
-    sys.exit("❌  pip install openai")
+HAS_ANTHROPIC = _has("anthropic")   # only needed for --batch with --provider anthropic
+HAS_TIKTOKEN  = _has("tiktoken")    # exact token counts for history trimming; falls back to ~4 chars/token
+HAS_ARROW     = _has("pyarrow")
+HAS_RICH      = _has("rich")
 
-try:
-    from rich.console import Console
-    from rich.markdown import Markdown
-    from rich.panel import Panel
-    from rich.table import Table
-    HAS_RICH = True
-    console  = Console()
-except ImportError:
-    HAS_RICH = False
-    console  = None
+pd = np = None
+AsyncOpenAI = RETRYABLE = None
+console = None
+
+def _load_data_libs():
+    global pd, np
+    if pd is None:
+        try:
+            import pandas as pd
+            import numpy as np
+        except ImportError:
+            sys.exit("❌  pip install pandas numpy")
+
+def _load_openai():
+    global AsyncOpenAI, RETRYABLE
+    if AsyncOpenAI is None:
+        try:
+            from openai import (AsyncOpenAI, RateLimitError, APIConnectionError,
+                                APITimeoutError, InternalServerError)
+        except ImportError:
+            sys.exit("❌  pip install openai")
+        RETRYABLE = (RateLimitError, APIConnectionError, APITimeoutError, InternalServerError)
+
+def _load_rich():
+    global console, Markdown, Panel, Table, Live
+    if console is None:
+        from rich.console import Console
+        from rich.markdown import Markdown
+        from rich.panel import Panel
+        from rich.table import Table
+        from rich.live import Live
+        console = Console()
 
 # ── Constants ─────────────────────────────────────────────────────────────────
 NVIDIA_BASE_URL    = "https://integrate.api.nvidia.com/v1"
@@ -55,8 +88,33 @@ ANTHROPIC_BASE_URL = "https://api.anthropic.com/v1"
 MAX_PROFILE_CHARS = 24_000
 # MAX chars for dynamic stats per question
 MAX_DYNAMIC_CHARS = 4_000
-# MAX conversation history messages kept (prevents context creep over many turns)
-MAX_HISTORY_TURNS = 6
+# MAX tokens of prior conversation resent each turn (prevents context creep over many turns)
+MAX_HISTORY_TOKENS = 8_000
+# MAX in-flight API requests when several questions are answered at once
+MAX_CONCURRENCY   = 8
+# Requests/minute across all concurrent calls (NVIDIA NIM free tier allows 40)
+MAX_REQUESTS_PER_MIN = int(os.getenv("INSIGHTX_RPM", "40"))
+# 429 / transient-error retries: delay = RETRY_BASE_DELAY * 2**attempt + jitter
+MAX_RETRIES       = 4
+RETRY_BASE_DELAY  = 1.0
+# Batch API polling: start interval, doubling up to the max (seconds)
+BATCH_POLL_START  = 5
+BATCH_POLL_MAX    = 120
+# Profiles of unchanged CSVs are reused from here; bump the version when the profile format changes
+PROFILE_CACHE_DIR     = Path.home() / ".cache" / "insightx"
+PROFILE_CACHE_VERSION = 3
+# Sample-row values longer than this are cut in the profile
+SAMPLE_VALUE_CHARS    = 60
+# Above this many rows, distribution stats / top-k / correlations use a random sample
+PROFILE_SAMPLE_ROWS   = 1_000_000
+# Answer cache: reuse a previous answer when a new question is this similar (cosine)
+QA_CACHE_SIM      = 0.93
+QA_CACHE_MODEL    = "all-MiniLM-L6-v2"
+# Questions containing any of these lean on the conversation, so mid-conversation they bypass the answer cache
+FOLLOWUP_WORDS    = frozenset({"why", "it", "its", "that", "this", "those", "these", "they", "them", "their",
+                               "more", "also", "else", "same", "previous", "above", "again", "then", "instead"})
+# pyarrow CSV read block size — bigger blocks mean fewer, larger parallel parse chunks
+CSV_BLOCK_SIZE    = 64 << 20
 
 NVIDIA_MODELS = [
     ("meta/llama-3.3-70b-instruct",            "Llama 3.3 70B      ← recommended"),
@@ -70,21 +128,101 @@ DEFAULT_ANTHROPIC_MODEL = "claude-opus-4-6"
 # ── Display helpers ───────────────────────────────────────────────────────────
 def print_md(text):
     if HAS_RICH:
+        _load_rich()
         console.print(Markdown(text))
     else:
         print(text)
 
+def stream_md(run_with):
+    """
+    Render an answer while it streams in. run_with(on_text) must call on_text with
+    the text received so far after each chunk and return the final answer.
+    """
+    if HAS_RICH:
+        _load_rich()
+        with Live(Markdown(""), console=console, refresh_per_second=8,
+                  vertical_overflow="visible") as live:
+            answer = run_with(lambda text: live.update(Markdown(text)))
+            live.update(Markdown(answer))
+        return answer
+
+    shown = 0
+    def on_text(text):
+        nonlocal shown
+        print(text[shown:], end="", flush=True)
+        shown = len(text)
+    answer = run_with(on_text)
+    print(answer[shown:])   # whole answer if nothing streamed, else any tail such as an error note
+    return answer
+
 def print_panel(text, title="", style="blue"):
     if HAS_RICH:
+        _load_rich()
         console.print(Panel(text, title=title, border_style=style))
     else:
         print(f"\n{'='*60}\n  {title}\n{'='*60}\n{text}\n")
 
+# ── Token counting ────────────────────────────────────────────────────────────
+@lru_cache(maxsize=1)
+def _token_encoder():
+    if not HAS_TIKTOKEN:
+        return None
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("cl100k_base")   # close enough for Llama / Claude budgets
+    except Exception:
+        return None   # BPE file not cached and no network
+
+@lru_cache(maxsize=4096)
+def count_tokens(text: str) -> int:
+    enc = _token_encoder()
+    return len(enc.encode(text)) if enc else len(text) // 4 + 1
+
+# ── Answer cache helpers ──────────────────────────────────────────────────────
+@lru_cache(maxsize=1)
+def _qa_embedder():
+    """sentence-transformers model for the answer cache, loaded on first use (None if not installed)."""
+    try:
+        from sentence_transformers import SentenceTransformer
+        return SentenceTransformer(QA_CACHE_MODEL)
+    except ImportError:
+        return None
+    except Exception as e:
+        print(f"⚠️  Answer cache model unavailable ({e}) — matching exact questions only")
+        return None
+
+def normalize_question(text: str) -> str:
+    return " ".join("".join(ch for ch in text.lower() if ch.isalnum() or ch.isspace()).split())
+
 # ── CSV loader ────────────────────────────────────────────────────────────────
+def read_csv_fast(path, encoding):
+    """
+    Parse with pyarrow's multithreaded reader when installed, else pandas' C parser.
+    Columns come back as regular numpy/object dtypes so the rest of the code is unchanged
+    (except ISO timestamps, which pyarrow parses to datetime64; date-only columns stay text).
+    """
+    _load_data_libs()
+    if HAS_ARROW:
+        import pyarrow as pa
+        import pyarrow.csv as pv
+        try:
+            read_opts = pv.ReadOptions(encoding=encoding, block_size=CSV_BLOCK_SIZE)
+            tbl = pv.read_csv(path, read_options=read_opts)
+            # undecodable text comes back as binary columns instead of an error
+            if not any(pa.types.is_binary(t) for t in tbl.schema.types):
+                # date-only columns stay text, as pandas reads them (not datetime.date objects)
+                tbl = tbl.cast(pa.schema([pa.field(fld.name, pa.string()) if pa.types.is_date(fld.type) else fld
+                                          for fld in tbl.schema]))
+                return tbl.to_pandas()
+        except pa.ArrowInvalid:
+            pass   # stricter parsing than pandas — let pandas decide
+    return pd.read_csv(path, encoding=encoding, low_memory=False)
+
 def load_csv(path):
+    _load_data_libs()
     for enc in ("utf-8", "latin-1", "cp1252"):
         try:
-            df = pd.read_csv(path, encoding=enc, low_memory=False)
+            df = compact_dtypes(read_csv_fast(path, enc))
             print(f"\n✅  Loaded '{Path(path).name}'  →  {df.shape[0]:,} rows × {df.shape[1]} columns")
             return df
         except UnicodeDecodeError:
@@ -93,63 +231,121 @@ def load_csv(path):
             sys.exit(f"❌  {e}")
     sys.exit("❌  Cannot decode CSV.")
 
+# Object columns with fewer distinct values than this share of rows become categoricals
+CATEGORY_MAX_RATIO = 0.5
+# float64 → float32 halves memory but loses precision in corr()/std(); opt-in only
+DOWNCAST_FLOATS    = os.getenv("INSIGHTX_DOWNCAST_FLOATS", "") == "1"
+
+def compact_dtypes(df: pd.DataFrame, downcast_floats: bool = DOWNCAST_FLOATS) -> pd.DataFrame:
+    """
+    Shrink the frame after loading:
+      • low-cardinality text columns → 'category', so value_counts, nunique and
+        groupby run on integer codes instead of hashing Python strings
+      • integers → the smallest int type that fits (and floats → float32 if enabled),
+        so describe/corr/groupby reductions read fewer bytes
+    """
+    _load_data_libs()
+    n = max(len(df), 1)
+    for c in df.select_dtypes(include="object").columns:
+        if df[c].nunique(dropna=False) / n < CATEGORY_MAX_RATIO:
+            df[c] = df[c].astype("category")
+    for c in df.select_dtypes(include="integer").columns:
+        df[c] = pd.to_numeric(df[c], downcast="integer")
+    if downcast_floats:
+        for c in df.select_dtypes(include="float").columns:
+            df[c] = pd.to_numeric(df[c], downcast="float")
+    return df
+
 # ── Smart dataset profiler (token-safe) ───────────────────────────────────────
 def profile_dataframe(df: pd.DataFrame) -> str:
     """
     Build a COMPACT plain-text profile of the dataframe.
     Hard-capped at MAX_PROFILE_CHARS to never blow the context window.
     """
+    _load_data_libs()
     lines = []
     lines.append(f"Shape: {df.shape[0]:,} rows × {df.shape[1]} columns\n")
 
+    # Distribution stats come from a fixed-seed sample on big frames;
+    # shape, null counts and min/max stay exact (cheap single passes)
+    sampled = len(df) > PROFILE_SAMPLE_ROWS
+    df_s    = df.sample(PROFILE_SAMPLE_ROWS, random_state=0) if sampled else df
+    if sampled:
+        lines.append(f"(mean/std/quartiles, unique counts, top5 and correlations "
+                     f"estimated from a {PROFILE_SAMPLE_ROWS:,}-row random sample)\n")
+
+    # Column lists and per-column null counts computed once, indexed below
+    num_cols    = df.select_dtypes(include="number").columns.tolist()
+    cat_cols    = df.select_dtypes(include=["object","category"]).columns.tolist()
+    null_counts = df.isna().sum()
+
     # ── Numeric columns ───────────────────────────────────────────────────────
-    num_cols = df.select_dtypes(include="number").columns.tolist()
     if num_cols:
         lines.append("NUMERIC COLUMNS:")
-        desc = df[num_cols].describe().round(2)
-        for col in num_cols:
-            d = desc[col]
+        # One float matrix, column-wise NumPy reductions (all quartiles in a single call)
+        arr = df_s[num_cols].to_numpy(dtype="float64", na_value=np.nan)
+        with np.errstate(all="ignore"), warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)   # all-NaN columns → nan, like describe()
+            mean = np.nanmean(arr, axis=0).round(2)
+            std  = np.nanstd(arr, axis=0, ddof=1)
+            mn   = df[num_cols].min().to_numpy(dtype="float64", na_value=np.nan).round(2)
+            mx   = df[num_cols].max().to_numpy(dtype="float64", na_value=np.nan).round(2)
+            p25, p50, p75 = np.nanpercentile(arr, [25, 50, 75], axis=0).round(2)
+        for k, col in enumerate(num_cols):
             lines.append(
-                f"  {col}: mean={d['mean']}, min={d['min']}, max={d['max']}, "
-                f"std={d['std']:.2f}, p25={d['25%']}, median={d['50%']}, p75={d['75%']}, "
-                f"nulls={int(df[col].isna().sum())}"
+                f"  {col}: mean={mean[k]}, min={mn[k]}, max={mx[k]}, "
+                f"std={std[k]:.2f}, p25={p25[k]}, median={p50[k]}, p75={p75[k]}, "
+                f"nulls={int(null_counts[col])}"
             )
 
     # ── Categorical columns ───────────────────────────────────────────────────
-    cat_cols = df.select_dtypes(include=["object","category"]).columns.tolist()
     if cat_cols:
         lines.append("\nCATEGORICAL COLUMNS:")
-        for col in cat_cols:
-            vc    = df[col].value_counts()
-            top5  = dict(vc.head(5))
+        nunique = df_s[cat_cols].nunique()
+        # value_counts per column is independent and spends its time in GIL-free C code
+        with ThreadPoolExecutor(max_workers=min(len(cat_cols), os.cpu_count() or 1)) as ex:
+            top5s = list(ex.map(lambda c: dict(df_s[c].value_counts().head(5)), cat_cols))
+        for col, top5 in zip(cat_cols, top5s):
             lines.append(
-                f"  {col}: {df[col].nunique()} unique, "
-                f"nulls={int(df[col].isna().sum())}, "
+                f"  {col}: {int(nunique[col])} unique, "
+                f"nulls={int(null_counts[col])}, "
                 f"top5={top5}"
             )
 
+    # ── Datetime columns (already parsed at load) ────────────────────────────
+    dt_cols = df.select_dtypes(include="datetime").columns.tolist()
+    if dt_cols:
+        lines.append("\nDATETIME COLUMNS:")
+        for col in dt_cols:
+            lines.append(
+                f"  {col}: {df[col].min()} → {df[col].max()}, nulls={int(null_counts[col])}"
+            )
+
     # ── Correlations (top 8 pairs only) ───────────────────────────────────────
     if len(num_cols) >= 2:
-        corr  = df[num_cols].corr().round(3)
-        pairs, seen = [], set()
-        for c1 in corr.columns:
-            for c2 in corr.columns:
-                if c1 != c2 and (c2, c1) not in seen:
-                    pairs.append((c1, c2, float(corr.loc[c1, c2])))
-                    seen.add((c1, c2))
-        pairs.sort(key=lambda x: abs(x[2]), reverse=True)
+        corr  = df_s[num_cols].corr().round(3).to_numpy()
+        i, j  = np.triu_indices_from(corr, k=1)      # each unordered pair once
+        vals  = corr[i, j]
+        k     = min(8, len(vals))
+        key   = np.where(np.isnan(vals), np.inf, -np.abs(vals))   # strongest first, NaN last
+        cut   = key[np.argpartition(key, k - 1)[:k]].max()
+        # everything tied at the cutoff stays a candidate, so ties resolve by pair order as a full sort would
+        cand  = np.flatnonzero(key <= cut)
+        top   = cand[np.argsort(key[cand], kind="stable")][:k]
         lines.append("\nTOP CORRELATIONS:")
-        for a, b, r in pairs[:8]:
-            lines.append(f"  {a} ↔ {b}  r={r}")
+        for t in top:
+            lines.append(f"  {num_cols[i[t]]} ↔ {num_cols[j[t]]}  r={float(vals[t])}")
 
     # ── Sample rows (5 rows, stringified compactly) ───────────────────────────
-    lines.append("\nSAMPLE ROWS (first 5):")
-    sample_str = df.head(5).to_string(index=False, max_cols=20)
-    lines.append(sample_str)
+    # One JSON object per row — far fewer chars than a padded fixed-width table
+    lines.append("\nSAMPLE ROWS (first 5, JSON lines):")
+    for rec in df.head(5).to_dict(orient="records"):
+        rec = {k: (v if isinstance(v, (int, float, bool)) or v is None else str(v)[:SAMPLE_VALUE_CHARS])
+               for k, v in rec.items()}
+        lines.append(json.dumps(rec, default=str, ensure_ascii=False))
 
     # ── Missing values ─────────────────────────────────────────────────────────
-    missing = df.isnull().sum()
-    missing = missing[missing > 0]
+    missing = null_counts[null_counts > 0]
     if not missing.empty:
         lines.append("\nMISSING VALUES:")
         for col, cnt in missing.items():
@@ -166,62 +362,134 @@ def profile_dataframe(df: pd.DataFrame) -> str:
     return full
 
 
+def profile_cached(df: pd.DataFrame, path) -> str:
+    """
+    profile_dataframe() memoised on disk, keyed by the CSV's path, mtime and size.
+    A warm start on an unchanged file skips every describe/corr/value_counts pass.
+    """
+    st  = os.stat(path)
+    key = f"v{PROFILE_CACHE_VERSION}|{Path(path).resolve()}|{st.st_mtime_ns}|{st.st_size}"
+    cache = PROFILE_CACHE_DIR / f"{hashlib.sha1(key.encode()).hexdigest()}.txt"
+    if cache.exists():
+        return cache.read_text(encoding="utf-8")
+
+    full = profile_dataframe(df)
+    try:
+        PROFILE_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        cache.write_text(full, encoding="utf-8")
+    except OSError:
+        pass   # cache is best-effort (read-only home, etc.)
+    return full
+
+
 # ── Dynamic stats per question (also token-safe) ──────────────────────────────
-def compute_dynamic_stats(df: pd.DataFrame, question: str) -> str:
-    q        = question.lower()
-    extras   = []
-    num_cols = df.select_dtypes(include="number").columns.tolist()
-    cat_cols = df.select_dtypes(include=["object","category"]).columns.tolist()
+DATE_COL_KWS  = ("date","time","month","year","period")
+FRAUD_COL_KWS = ("fraud","risk","anomaly","flag")
+TREND_Q_KWS   = ("trend","over time","monthly","yearly","growth")
+TOP_Q_KWS     = ("top","highest","most","largest")
+BOTTOM_Q_KWS  = ("bottom","lowest","least","smallest")
+
+def column_meta(df: pd.DataFrame) -> dict:
+    """
+    Everything compute_dynamic_stats needs that depends only on the dataframe,
+    not the question — build once per dataset and pass in. "handlers" is the
+    per-question dispatch table: (compiled trigger regex, fn(q) -> list[str]) in
+    output order, with handlers for absent columns left out entirely.
+    """
+    _load_data_libs()
+    num_cols  = df.select_dtypes(include="number").columns.tolist()
+    cat_cols  = df.select_dtypes(include=["object","category"]).columns.tolist()
+    lowered   = {c: c.lower() for c in df.columns}
+    # (name, lowercase, lowercase with "_" → " ") for matching against the question
+    cat_names = [(c, lowered[c], lowered[c].replace("_"," ")) for c in cat_cols]
+    # only the first matching column of each kind is ever used
+    date_col  = next((c for c, l in lowered.items() if any(k in l for k in DATE_COL_KWS)), None)
+    fraud_col = next((c for c, l in lowered.items() if any(k in l for k in FRAUD_COL_KWS)), None)
 
     # Categorical groupby if column name mentioned in question
-    for col in cat_cols:
-        if col.lower() in q or col.replace("_"," ").lower() in q:
-            for nc in num_cols[:2]:          # max 2 numeric cols
-                try:
-                    grp = df.groupby(col)[nc].agg(["mean","sum","count"]).round(2)
-                    extras.append(f"GroupBy {col}×{nc}:\n{grp.to_string()}")
-                except Exception:
-                    pass
-            vc = df[col].value_counts().head(8)
-            extras.append(f"Value counts '{col}':\n{vc.to_string()}")
-            break   # only one cat col per query
+    def cat_breakdown(q):
+        out = []
+        for col, low, spaced in cat_names:
+            if low in q or spaced in q:
+                if num_cols:
+                    try:
+                        # one hash build + one scan for up to 2 numeric cols
+                        ncs = num_cols[:2]
+                        grp = (df.groupby(col, observed=True, sort=False)[ncs]
+                                 .agg(["mean","sum","count"]).round(2))
+                        out.append(f"GroupBy {col}×{'/'.join(ncs)}:\n{grp.to_string()}")
+                    except Exception:
+                        pass
+                vc = df[col].value_counts().head(8)
+                out.append(f"Value counts '{col}':\n{vc.to_string()}")
+                break   # only one cat col per query
+        return out
 
     # Time trend
-    for col in df.columns:
-        if any(kw in col.lower() for kw in ("date","time","month","year","period")):
-            if any(kw in q for kw in ("trend","over time","monthly","yearly","growth")):
-                try:
-                    df2 = df.copy()
-                    df2["__dt"] = pd.to_datetime(df2[col], errors="coerce")
-                    df2 = df2.dropna(subset=["__dt"])
-                    df2["__p"] = df2["__dt"].dt.to_period("M")
-                    for nc in num_cols[:1]:
-                        ts = df2.groupby("__p")[nc].sum().tail(12)
-                        extras.append(f"Monthly '{nc}':\n{ts.to_string()}")
-                except Exception:
-                    pass
-            break
+    def time_trend(q):
+        out = []
+        try:
+            period = pd.to_datetime(df[date_col], errors="coerce").dt.to_period("M")
+            mask   = period.notna()
+            for nc in num_cols[:1]:
+                ts = df.loc[mask, nc].groupby(period[mask].rename("__p")).sum().tail(12)
+                out.append(f"Monthly '{nc}':\n{ts.to_string()}")
+        except Exception:
+            pass
+        return out
 
     # Fraud/risk breakdown
-    for col in df.columns:
-        if any(kw in col.lower() for kw in ("fraud","risk","anomaly","flag")):
-            if col.lower() in q or "fraud" in q or "risk" in q:
-                try:
-                    extras.append(f"'{col}' counts:\n{df[col].value_counts().to_string()}")
-                    for cc in cat_cols[:2]:
-                        grp = df.groupby(cc)[col].mean().sort_values(ascending=False).round(4)
-                        extras.append(f"Fraud rate by '{cc}':\n{grp.to_string()}")
-                except Exception:
-                    pass
-            break
+    def fraud_breakdown(q):
+        out = []
+        try:
+            out.append(f"'{fraud_col}' counts:\n{df[fraud_col].value_counts().to_string()}")
+            for cc in cat_cols[:2]:
+                grp = df.groupby(cc, observed=True)[fraud_col].mean().sort_values(ascending=False).round(4)
+                out.append(f"Fraud rate by '{cc}':\n{grp.to_string()}")
+        except Exception:
+            pass
+        return out
 
     # Top / bottom
-    if any(kw in q for kw in ("top","highest","most","largest")):
-        for nc in num_cols[:1]:
-            extras.append(f"Top 5 '{nc}':\n{df[nc].nlargest(5).to_string()}")
-    if any(kw in q for kw in ("bottom","lowest","least","smallest")):
-        for nc in num_cols[:1]:
-            extras.append(f"Bottom 5 '{nc}':\n{df[nc].nsmallest(5).to_string()}")
+    def top5(q):
+        nc = num_cols[0]
+        return [f"Top 5 '{nc}':\n{df[nc].nlargest(5).to_string()}"]
+
+    def bottom5(q):
+        nc = num_cols[0]
+        return [f"Bottom 5 '{nc}':\n{df[nc].nsmallest(5).to_string()}"]
+
+    # each handler's trigger substrings compiled into one alternation — a single scan per handler
+    def triggers(*words):
+        return re.compile("|".join(map(re.escape, dict.fromkeys(words))))
+
+    handlers = []
+    if cat_names:
+        handlers.append((triggers(*(n for _, low, spaced in cat_names for n in (low, spaced))), cat_breakdown))
+    if date_col:
+        handlers.append((triggers(*TREND_Q_KWS), time_trend))
+    if fraud_col:
+        handlers.append((triggers(lowered[fraud_col], "fraud", "risk"), fraud_breakdown))
+    if num_cols:
+        handlers.append((triggers(*TOP_Q_KWS), top5))
+        handlers.append((triggers(*BOTTOM_Q_KWS), bottom5))
+
+    return {
+        "num_cols":  num_cols,
+        "cat_cols":  cat_cols,
+        "cat_names": cat_names,
+        "date_col":  date_col,
+        "fraud_col": fraud_col,
+        "handlers":  handlers,
+    }
+
+def compute_dynamic_stats(df: pd.DataFrame, question: str, meta: dict = None) -> str:
+    meta   = meta or column_meta(df)
+    q      = question.lower()
+    extras = []
+    for trigger, fn in meta["handlers"]:
+        if trigger.search(q):
+            extras.extend(fn(q))
 
     result = "\n\n".join(extras) if extras else "(No additional stats for this question.)"
 
@@ -252,53 +520,304 @@ RESPONSE FORMAT:
 • Never fabricate numbers. Only use data from the profile or live stats provided."""
 
 
+LIVE_STATS_MARK = "[LIVE STATS FOR THIS QUESTION]"
+
+OVERVIEW_QUESTION = (
+    "Give me a concise executive overview of this dataset. "
+    "What are the 3-5 most important headlines a CEO should know immediately? "
+    "Highlight key risks, top performers, and strategic opportunities. Be brief."
+)
+
+
 # ── AI engine ─────────────────────────────────────────────────────────────────
+class RateLimiter:
+    """Async token bucket: at most `rate` acquisitions per `period` seconds."""
+
+    def __init__(self, rate, period=60.0):
+        self.rate    = rate
+        self.period  = period
+        self._tokens = float(rate)
+        self._last   = time.monotonic()
+        self._lock   = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.rate, self._tokens + (now - self._last) * self.rate / self.period)
+                self._last   = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) * self.period / self.rate)
+
+
+
 class InsightXAI:
-    def __init__(self, df, filename, provider, api_key, model):
+    def __init__(self, df, filename, provider, api_key, model,
+                 max_concurrency=MAX_CONCURRENCY, csv_path=None, rpm=MAX_REQUESTS_PER_MIN):
+        _load_data_libs()
+        _load_openai()
         self.df       = df
+        self.meta     = column_meta(df)
         self.filename = filename
+        self.provider = provider
+        self.api_key  = api_key
         self.model    = model
         self.history  = []
 
         print("⏳  Profiling dataset...")
-        profile_text  = profile_dataframe(df)
+        profile_text  = profile_cached(df, csv_path) if csv_path else profile_dataframe(df)
         print(f"✅  Profile size: {len(profile_text):,} chars  (~{len(profile_text)//4:,} tokens)")
 
         self.system = SYSTEM_TMPL.format(filename=filename, profile=profile_text)
 
         base_url = NVIDIA_BASE_URL if provider == "nvidia" else ANTHROPIC_BASE_URL
-        self.client = OpenAI(api_key=api_key, base_url=base_url)
+        # retries are done in _create() so they also pass through the rate limiter
+        self.client = AsyncOpenAI(api_key=api_key, base_url=base_url, max_retries=0)
+
+        # One long-lived loop so the async client's connection pool survives between REPL turns
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._sem     = asyncio.Semaphore(max_concurrency)
+        self._limiter = RateLimiter(rpm)
+        # (unit vector or None, normalized question, answer) for every answered standalone question;
+        # the data is fixed per session, so entries stay valid across reset()
+        self._qa_cache = []
 
     def _trimmed_history(self):
-        """Keep only the last MAX_HISTORY_TURNS * 2 messages to prevent context bloat."""
-        return self.history[-(MAX_HISTORY_TURNS * 2):]
-
-    def ask(self, question: str) -> str:
-        dynamic  = compute_dynamic_stats(self.df, question)
-        enriched = f"{question}\n\n[LIVE STATS FOR THIS QUESTION]\n{dynamic}"
+        """
+        Newest prior messages that fit in MAX_HISTORY_TOKENS. History holds raw
+        questions only; live stats are attached to the outgoing turn, never stored.
+        """
+        kept, used = [], 0
+        for m in reversed(self.history):
+            used += count_tokens(m["content"])
+            if used > MAX_HISTORY_TOKENS:
+                break
+            kept.append(m)
+        kept.reverse()
+        while kept and kept[0]["role"] != "user":   # never open on an orphaned answer
+            kept.pop(0)
+        return kept
+
+    def _enrich(self, question: str) -> str:
+        dynamic = compute_dynamic_stats(self.df, question, self.meta)
+        return f"{question}\n\n{LIVE_STATS_MARK}\n{dynamic}"
+
+    async def _create(self, messages: list, stream: bool = False):
+        """chat.completions.create behind the RPM limiter, retrying 429s and transient errors."""
+        for attempt in range(MAX_RETRIES + 1):
+            await self._limiter.acquire()
+            try:
+                return await self.client.chat.completions.create(
+                    model=self.model, messages=messages,
+                    max_tokens=1024, temperature=0.3, stream=stream
+                )
+            except RETRYABLE as e:
+                if attempt == MAX_RETRIES:
+                    raise
+                delay = RETRY_BASE_DELAY * 2 ** attempt + random.random()
+                retry_after = getattr(getattr(e, "response", None), "headers", {}).get("retry-after")
+                if retry_after and retry_after.replace(".", "", 1).isdigit():
+                    delay = max(delay, float(retry_after))
+                await asyncio.sleep(delay)
+
+    # both return (answer text, True if the call completed without an error)
+    async def _one_call(self, messages: list) -> tuple[str, bool]:
+        async with self._sem:
+            try:
+                resp = await self._create(messages)
+                return resp.choices[0].message.content, True
+            except Exception as e:
+                return f"⚠️  API error: {e}", False
+
+    async def _stream_call(self, messages: list, on_text) -> tuple[str, bool]:
+        async with self._sem:
+            buf = []
+            try:
+                stream = await self._create(messages, stream=True)
+                async for chunk in stream:
+                    delta = chunk.choices[0].delta.content if chunk.choices else None
+                    if delta:
+                        buf.append(delta)
+                        on_text("".join(buf))
+                return "".join(buf), True
+            except Exception as e:
+                return "".join(buf) + f"\n\n⚠️  API error: {e}", False
+
+    def _embed(self, question: str):
+        model = _qa_embedder()
+        if model is None:
+            return None
+        return model.encode(question, normalize_embeddings=True)
+
+    def _cacheable(self, norm: str) -> bool:
+        """Opening questions always; later ones only if nothing in them refers back to the conversation."""
+        return not self.history or FOLLOWUP_WORDS.isdisjoint(norm.split())
+
+    async def _cache_lookup(self, question: str, norm: str):
+        """
+        (cached answer or None, embedding) among earlier standalone questions.
+        Exact normalized text first, then cosine similarity ≥ QA_CACHE_SIM when
+        sentence-transformers is available.
+        """
+        for _, nq, a in self._qa_cache:
+            if nq == norm:
+                return a, None
+        vec = await asyncio.to_thread(self._embed, question)
+        if vec is not None:
+            hits = [(v, a) for v, _, a in self._qa_cache if v is not None]
+            if hits:
+                sims = np.stack([v for v, _ in hits]) @ vec
+                best = int(np.argmax(sims))
+                if sims[best] >= QA_CACHE_SIM:
+                    return hits[best][1], vec
+        return None, vec
+
+    async def ask(self, question: str, on_text=None) -> str:
+        """Answer one question. With on_text, the reply is streamed and on_text(text_so_far) called per chunk."""
+        norm        = normalize_question(question)
+        cacheable   = self._cacheable(norm)
+        cached, vec = await self._cache_lookup(question, norm) if cacheable else (None, None)
+        if cached is not None:
+            answer = cached + "\n\n_(cached answer)_"
+            if on_text:
+                on_text(answer)
+            self.history.append({"role": "user", "content": question})
+            self.history.append({"role": "assistant", "content": cached})
+            return answer
+
+        messages = ([{"role": "system", "content": self.system}] + self._trimmed_history()
+                    + [{"role": "user", "content": self._enrich(question)}])
+        self.history.append({"role": "user", "content": question})
+
+        if on_text:
+            answer, ok = await self._stream_call(messages, on_text)
+        else:
+            answer, ok = await self._one_call(messages)
 
-        self.history.append({"role": "user", "content": enriched})
+        self.history.append({"role": "assistant", "content": answer})
+        if ok and cacheable:   # a failed call is retried next time, not replayed from the cache
+            self._qa_cache.append((vec, norm, answer))
+        return answer
 
-        messages = [{"role": "system", "content": self.system}] + self._trimmed_history()
+    async def ask_many(self, questions: list[str]) -> list[str]:
+        """
+        Answer independent questions concurrently (at most max_concurrency in flight).
+        Every question sees the same prior history; all Q&A pairs are appended afterwards.
+        """
+        base     = [{"role": "system", "content": self.system}] + self._trimmed_history()
+        all_msgs = [base + [{"role": "user", "content": self._enrich(q)}] for q in questions]
+
+        results = await asyncio.gather(*[self._one_call(msgs) for msgs in all_msgs])
+        answers = [a for a, _ in results]
+
+        for q, a in zip(questions, answers):
+            self.history.append({"role": "user", "content": q})
+            self.history.append({"role": "assistant", "content": a})
+        return answers
+
+    async def ask_batch(self, questions: list[str]) -> list[str]:
+        """
+        Answer questions through the provider's Batch API (≈50% cheaper, may take
+        minutes to hours). Falls back to ask_many() if the batch cannot be run.
+        """
+        base     = [{"role": "system", "content": self.system}] + self._trimmed_history()
+        all_msgs = [base + [{"role": "user", "content": self._enrich(q)}] for q in questions]
 
         try:
-            resp   = self.client.chat.completions.create(
-                model=self.model, messages=messages,
-                max_tokens=1024, temperature=0.3
-            )
-            answer = resp.choices[0].message.content
+            if self.provider == "anthropic":
+                answers = await self._anthropic_batch(all_msgs)
+            else:
+                answers = await self._openai_batch(all_msgs)
         except Exception as e:
-            answer = f"⚠️  API error: {e}"
+            print(f"⚠️  Batch API unavailable ({e}) — falling back to real-time calls.")
+            return await self.ask_many(questions)
+
+        for q, a in zip(questions, answers):
+            self.history.append({"role": "user", "content": q})
+            self.history.append({"role": "assistant", "content": a})
+        return answers
+
+    async def _openai_batch(self, all_msgs: list) -> list[str]:
+        lines = [
+            json.dumps({
+                "custom_id": str(i), "method": "POST", "url": "/v1/chat/completions",
+                "body": {"model": self.model, "messages": msgs, "max_tokens": 1024, "temperature": 0.3},
+            })
+            for i, msgs in enumerate(all_msgs)
+        ]
+        upload = await self.client.files.create(
+            file=("insightx_batch.jsonl", "\n".join(lines).encode("utf-8")), purpose="batch"
+        )
+        batch = await self.client.batches.create(
+            input_file_id=upload.id, endpoint="/v1/chat/completions", completion_window="24h"
+        )
+        print(f"📦  Submitted batch {batch.id} ({len(all_msgs)} requests)")
+
+        delay = BATCH_POLL_START
+        while batch.status not in ("completed", "failed", "expired", "cancelled"):
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, BATCH_POLL_MAX)
+            batch = await self.client.batches.retrieve(batch.id)
+        if batch.status != "completed" or not batch.output_file_id:
+            raise RuntimeError(f"batch {batch.id} ended with status '{batch.status}'")
+
+        answers = ["⚠️  No result returned for this question."] * len(all_msgs)
+        raw = (await self.client.files.content(batch.output_file_id)).text
+        for line in raw.splitlines():
+            if not line.strip():
+                continue
+            rec     = json.loads(line)
+            choices = ((rec.get("response") or {}).get("body") or {}).get("choices")
+            answers[int(rec["custom_id"])] = (
+                choices[0]["message"]["content"] if choices else f"⚠️  API error: {rec.get('error')}"
+            )
+        return answers
+
+    async def _anthropic_batch(self, all_msgs: list) -> list[str]:
+        if not HAS_ANTHROPIC:
+            raise RuntimeError("pip install anthropic")
+        from anthropic import AsyncAnthropic
+        client   = AsyncAnthropic(api_key=self.api_key)
+        requests = [
+            {"custom_id": str(i),
+             "params": {"model": self.model, "max_tokens": 1024, "temperature": 0.3,
+                        "system": self.system, "messages": msgs[1:]}}   # system goes in its own field
+            for i, msgs in enumerate(all_msgs)
+        ]
+        batch = await client.messages.batches.create(requests=requests)
+        print(f"📦  Submitted batch {batch.id} ({len(all_msgs)} requests)")
+
+        delay = BATCH_POLL_START
+        while batch.processing_status != "ended":
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, BATCH_POLL_MAX)
+            batch = await client.messages.batches.retrieve(batch.id)
+
+        answers = ["⚠️  No result returned for this question."] * len(all_msgs)
+        async for item in await client.messages.batches.results(batch.id):
+            res = item.result
+            answers[int(item.custom_id)] = (
+                res.message.content[0].text if res.type == "succeeded" else f"⚠️  API error: {res.type}"
+            )
+        return answers
 
-        self.history.append({"role": "assistant", "content": answer})
-        return answer
+    async def quick_overview(self, on_text=None) -> str:
+        return await self.ask(OVERVIEW_QUESTION, on_text)
 
-    def quick_overview(self) -> str:
-        return self.ask(
-            "Give me a concise executive overview of this dataset. "
-            "What are the 3-5 most important headlines a CEO should know immediately? "
-            "Highlight key risks, top performers, and strategic opportunities. Be brief."
-        )
+    def run(self, coro):
+        """Drive a coroutine to completion on this engine's event loop (for the sync REPL)."""
+        return self._loop.run_until_complete(coro)
+
+    def ask_sync(self, question: str, on_text=None) -> str:
+        return self.run(self.ask(question, on_text))
+
+    def close(self):
+        self.run(self.client.close())
+        self.run(self._loop.shutdown_asyncgens())
+        self._loop.close()
 
     def reset(self):
         self.history = []
@@ -334,6 +853,7 @@ SUGGESTED = [
 
 def show_columns(df):
     if HAS_RICH:
+        _load_rich()
         tbl = Table(title="Columns", header_style="bold blue")
         tbl.add_column("#", style="dim", width=4)
         tbl.add_column("Column", style="bold")
@@ -353,6 +873,7 @@ def show_stats(df):
         return
     desc = num.describe().round(2)
     if HAS_RICH:
+        _load_rich()
         tbl = Table(title="Numeric Summary", header_style="bold green")
         tbl.add_column("Stat", style="bold")
         for col in desc.columns:
@@ -369,7 +890,7 @@ def export_session(history, filename):
     lines = [f"InsightX AI — {filename}  ({ts})\n{'='*60}"]
     for m in history:
         role    = "YOU" if m["role"] == "user" else "INSIGHTX AI"
-        content = m["content"].split("[LIVE STATS FOR THIS QUESTION]")[0].strip()
+        content = m["content"].split(LIVE_STATS_MARK)[0].strip()
         lines.append(f"\n[{role}]\n{content}\n{'─'*60}")
     out.write_text("\n".join(lines), encoding="utf-8")
     print(f"✅  Saved: {out.resolve()}")
@@ -423,6 +944,10 @@ def main():
     ap.add_argument("--api-key")
     ap.add_argument("--model")
     ap.add_argument("--no-overview", action="store_true")
+    ap.add_argument("-q", "--question", action="append", default=[],
+                    help="answer this question and exit (repeatable; questions run concurrently)")
+    ap.add_argument("--batch", action="store_true",
+                    help="with -q: submit via the provider Batch API (cheaper, slower)")
     args = ap.parse_args()
 
     print("""
@@ -438,7 +963,7 @@ def main():
     filename = Path(csv_path).name
 
     df = load_csv(csv_path)
-    ai = InsightXAI(df, filename, provider, api_key, model)
+    ai = InsightXAI(df, filename, provider, api_key, model, csv_path=csv_path)
 
     prov_label = "NVIDIA NIM" if provider == "nvidia" else "Anthropic"
     if HAS_RICH:
@@ -451,6 +976,21 @@ def main():
     else:
         print(f"\nReady! {prov_label} / {model} | {filename} {df.shape[0]:,}r × {df.shape[1]}c")
 
+    # ── Batch mode: overview + all -q questions in one concurrent round ───────
+    if args.question:
+        questions = ([] if args.no_overview else [OVERVIEW_QUESTION]) + args.question
+        if args.batch:
+            print(f"\n⏳  Submitting {len(questions)} question(s) to the Batch API...\n")
+            answers = ai.run(ai.ask_batch(questions))
+        else:
+            print(f"\n⏳  Answering {len(questions)} question(s) concurrently...\n")
+            answers = ai.run(ai.ask_many(questions))
+        for q, a in zip(questions, answers):
+            print_panel(q, title="❓  Question", style="cyan")
+            print_md(a)
+        ai.close()
+        return
+
     print("\n💡  Suggested questions:")
     for i, q in enumerate(SUGGESTED, 1):
         print(f"   {i}. {q}")
@@ -458,7 +998,7 @@ def main():
     if not args.no_overview:
         print("\n⏳  Generating executive overview...\n")
         try:
-            print_md(ai.quick_overview())
+            stream_md(lambda on_text: ai.run(ai.quick_overview(on_text)))
         except Exception as e:
             print(f"⚠️  {e}")
 
@@ -486,13 +1026,15 @@ def main():
         elif cmd == "export":             export_session(ai.history, filename)
         elif cmd == "overview":
             print("\n⏳  Generating...\n")
-            try:    print_md(ai.quick_overview())
+            try:    stream_md(lambda on_text: ai.run(ai.quick_overview(on_text)))
             except Exception as e: print(f"❌  {e}")
         else:
             print("\n⏳  Thinking...\n")
-            try:    print_md(ai.ask(user_input))
+            try:    stream_md(lambda on_text: ai.ask_sync(user_input, on_text))
             except Exception as e: print(f"❌  {e}")
             print("\n" + "─"*64)
 
+    ai.close()
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -3,6 +3,7 @@ InsightX AI — FastAPI Backend v2
 ==================================
 NEW in v2:
   GET  /api/dashboard   ← returns computed KPIs + chart data from uploaded CSV
+  POST /api/chat/stream ← same as /api/chat, reply streamed as plain text
 
 All original endpoints unchanged:
   POST /api/chat
@@ -14,16 +15,27 @@ All original endpoints unchanged:
 
 INSTALL & RUN:
   pip install fastapi uvicorn openai pandas python-dotenv numpy
+  pip install pyarrow        (optional — faster CSV parsing on upload)
+  pip install polars         (optional — parallel per-question stats for /api/chat)
+  pip install redis          (optional — with REDIS_URL set, sessions live in Redis with a TTL)
+  pip install orjson         (optional — faster JSON for sessions and cache keys)
+  pip install fast-histogram (optional — faster dashboard histogram)
   uvicorn main:app --reload --port 8000
 """
 
-import os, json, uuid, io
+import os, re, json, uuid, asyncio, hashlib, logging
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from functools import lru_cache
 from pathlib import Path
 from datetime import datetime
 from typing import Optional, Any
 
 from fastapi import FastAPI, HTTPException, UploadFile, File
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel
 
 try:
@@ -39,10 +51,41 @@ except ImportError:
     raise RuntimeError("pip install pandas numpy")
 
 try:
-    from openai import OpenAI
+    from openai import AsyncOpenAI
 except ImportError:
     raise RuntimeError("pip install openai")
 
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pv
+    HAS_ARROW = True
+except ImportError:
+    HAS_ARROW = False   # optional — pandas' C parser is used instead
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False  # optional — stdlib json is used instead
+
+try:
+    import redis
+    HAS_REDIS = True
+except ImportError:
+    HAS_REDIS = False   # optional — sessions stay in process memory
+
+try:
+    import polars as pl
+    HAS_POLARS = True
+except ImportError:
+    HAS_POLARS = False  # optional — per-question stats run on pandas instead
+
+try:
+    import fast_histogram
+    HAS_FAST_HIST = True
+except ImportError:
+    HAS_FAST_HIST = False  # optional — np.histogram is used instead
+
 
 # ── Config ────────────────────────────────────────────────────────────────────
 NVIDIA_BASE_URL    = "https://integrate.api.nvidia.com/v1"
@@ -52,12 +95,40 @@ PROVIDER  = os.getenv("AI_PROVIDER", "nvidia")
 AI_MODEL  = os.getenv("AI_MODEL", "meta/llama-3.3-70b-instruct")
 API_KEY   = os.getenv("NVIDIA_API_KEY") or os.getenv("ANTHROPIC_API_KEY", "")
 
+REDIS_URL   = os.getenv("REDIS_URL", "")               # e.g. redis://localhost:6379/0 — shared sessions
+SESSION_TTL = int(os.getenv("SESSION_TTL", "3600"))    # seconds a Redis-backed session lives after last write
+MAX_SESSIONS = int(os.getenv("MAX_SESSIONS", "1024"))  # in-process sessions kept; least recently written evicted
+
 MAX_PROFILE_CHARS = 24_000
 MAX_DYNAMIC_CHARS = 4_000
 MAX_HISTORY_TURNS = 6
+MAX_UPLOAD_CACHE  = 8    # parsed + profiled uploads kept for instant re-upload of the same file
+CATEGORY_MAX_RATIO = 0.5  # text columns with fewer unique values than this share of rows → 'category'
+MAX_REPLY_CACHE   = 512  # LLM replies kept for identical / near-identical requests
+REPLY_CACHE_SIM   = 0.95 # cosine above which a question reuses a cached reply (same context only)
+REPLY_CACHE_MODEL = "all-MiniLM-L6-v2"
+# first-turn replies to the sidebar sample questions, answered at startup and kept across restarts
+CANNED_REPLIES_PATH = Path(os.getenv("CANNED_REPLIES_PATH", Path(__file__).with_name("canned_replies.json")))
+WARM_SAMPLE_REPLIES = os.getenv("WARM_SAMPLE_REPLIES", "1") == "1"
 
 # ── App ───────────────────────────────────────────────────────────────────────
-app = FastAPI(title="InsightX AI API", version="2.0.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # one AI client for the whole process, so its connection pool is reused across requests
+    if API_KEY:
+        get_ai_client()
+    load_canned_replies()
+    warm = asyncio.create_task(warm_sample_replies()) if API_KEY and WARM_SAMPLE_REPLIES else None
+    yield
+    if warm is not None:
+        warm.cancel()
+    global _ai_client
+    if _ai_client is not None:
+        await _ai_client.close()
+        _ai_client = None
+
+
+app = FastAPI(title="InsightX AI API", version="2.0.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -66,14 +137,86 @@ app.add_middleware(
         "http://127.0.0.1:3000", "http://127.0.0.1:5173",
     ],
     allow_credentials=True, allow_methods=["*"], allow_headers=["*"],
+    expose_headers=["X-Session-Id", "X-Chart-Type"],   # read by clients of /api/chat/stream
 )
 
+# ── JSON helpers (orjson when installed) ──────────────────────────────────────
+def json_dumps(obj, sort_keys: bool = False) -> bytes:
+    # default=str covers values neither encoder knows (dates from the stdlib path, numpy scalars, …)
+    if HAS_ORJSON:
+        return orjson.dumps(obj, default=str, option=orjson.OPT_SORT_KEYS if sort_keys else 0)
+    return json.dumps(obj, sort_keys=sort_keys, default=str).encode()
+
+
+def json_loads(raw):
+    return orjson.loads(raw) if HAS_ORJSON else json.loads(raw)
+
+
+# ── Session store ─────────────────────────────────────────────────────────────
+class RedisSessions:
+    """
+    The subset of dict used for `sessions`, backed by Redis: each session is one
+    JSON string under "sess:<id>" that expires SESSION_TTL seconds after its last write.
+    """
+    def __init__(self, client, ttl: int):
+        self.r, self.ttl = client, ttl
+
+    def get(self, sid: str, default=None):
+        raw = self.r.get(f"sess:{sid}")
+        return json_loads(raw) if raw is not None else default
+
+    def __contains__(self, sid: str) -> bool:
+        return bool(self.r.exists(f"sess:{sid}"))
+
+    def __getitem__(self, sid: str) -> list[dict]:
+        history = self.get(sid)
+        if history is None:
+            raise KeyError(sid)
+        return history
+
+    def __setitem__(self, sid: str, history: list[dict]) -> None:
+        self.r.setex(f"sess:{sid}", self.ttl, json_dumps(history))
+
+    def pop(self, sid: str, default=None):
+        history = self.get(sid, default)
+        self.r.delete(f"sess:{sid}")
+        return history
+
+
+class LocalSessions(OrderedDict):
+    """In-process sessions, capped at `maxsize`: a write marks a session most recent, the oldest is dropped."""
+    def __init__(self, maxsize: int):
+        super().__init__()
+        self.maxsize = maxsize
+
+    def __setitem__(self, sid: str, history: list[dict]) -> None:
+        super().__setitem__(sid, history)
+        self.move_to_end(sid)
+        if len(self) > self.maxsize:
+            self.popitem(last=False)
+
+
 # ── Global state ──────────────────────────────────────────────────────────────
-sessions:         dict[str, list[dict]] = {}
+# Redis when REDIS_URL is set (shared across workers, TTL-bounded), else a bounded in-process LRU
+sessions: Any = (RedisSessions(redis.Redis.from_url(REDIS_URL), SESSION_TTL)
+                 if REDIS_URL and HAS_REDIS else LocalSessions(MAX_SESSIONS))
 _df:              Optional[pd.DataFrame] = None
 _df_filename:     str = ""
 _system_prompt:   str = ""
 _dashboard_cache: Optional[dict] = None   # computed once on upload
+_dashboard_json:  Optional[bytes] = None  # /api/dashboard body for _dashboard_cache, serialized on first request
+_lf:              Any = None               # Polars LazyFrame over _df, when polars is installed
+_schema:          dict = {}                # column roles of _df (see detect_schema), found once per upload
+_ai_client:       Optional[AsyncOpenAI] = None
+# (sha256 of file bytes, filename) → (df, lazyframe, schema, system prompt, dashboard); oldest evicted first
+_upload_cache:    dict[tuple[str, str], tuple[pd.DataFrame, Any, dict, str, dict]] = {}
+# blake2b(all messages) → reply, context hash + canonical question → reply,
+# and context hash → [(question embedding, contrast words, reply)]; oldest evicted first
+_reply_cache:     dict[str, str] = {}
+_canon_cache:     dict[tuple[str, str], str] = {}
+_semantic_cache:  dict[str, list[tuple[Any, frozenset, str]]] = {}
+# context hash + canonical question → reply for SAMPLE_QUERIES; never evicted
+_canned:          dict[tuple[str, str], str] = {}
 
 
 # ══════════════════════════════════════════════════════════════════════════════
@@ -120,13 +263,61 @@ def _safe(val):
     return val
 
 
-def compute_dashboard(df: pd.DataFrame, filename: str) -> dict:
+def _records(frame: pd.DataFrame) -> list[dict]:
+    """frame.to_dict('records') with plain Python values and NaN → None, without a per-cell walk."""
+    return frame.astype(object).where(frame.notna(), None).to_dict(orient="records")
+
+
+def uniform_histogram(arr: np.ndarray, bins: int = 10) -> tuple[np.ndarray, np.ndarray]:
+    """
+    np.histogram(arr, bins) — equal-width bins over [min, max] — via
+    fast_histogram when installed. Expects a numeric array with no NaN or ±inf.
+    """
+    if not HAS_FAST_HIST or not arr.size:
+        return np.histogram(arr, bins=bins)
+    arr = arr.astype("float64", copy=False)
+    lo, hi = float(arr.min()), float(arr.max())
+    if lo == hi:
+        lo, hi = lo - 0.5, hi + 0.5   # same widening as np.histogram
+    counts = fast_histogram.histogram1d(arr, bins, (lo, hi)).astype(np.int64)
+    counts[-1] += int(np.count_nonzero(arr == hi))   # last bin is closed on the right
+    return counts, np.linspace(lo, hi, bins + 1)
+
+
+# substrings that mark a column's role, matched against lowercased column names
+FRAUD_KEYS  = ("fraud", "flag", "risk", "anomaly")
+STATUS_KEYS = ("status", "success", "result")
+DATE_KEYS   = ("date", "time", "timestamp", "month", "period")
+
+
+def find_col(lowered: dict[str, str], keys: tuple[str, ...]) -> Optional[str]:
+    """First column whose lowercased name contains any of keys."""
+    return next((c for c, low in lowered.items() if any(k in low for k in keys)), None)
+
+
+def detect_schema(df: pd.DataFrame) -> dict:
+    """Column roles used by the dashboard and the per-question stats."""
+    num_cols = df.select_dtypes(include="number").columns.tolist()
+    lowered  = {c: c.lower() for c in df.columns}
+    return {
+        "num_cols":    num_cols,
+        "cat_cols":    df.select_dtypes(include=["object", "category"]).columns.tolist(),
+        "lowered":     lowered,
+        "primary_num": num_cols[0] if num_cols else None,
+        "fraud_col":   find_col(lowered, FRAUD_KEYS),
+        "status_col":  find_col(lowered, STATUS_KEYS),
+        "date_col":    find_col(lowered, DATE_KEYS),
+    }
+
+
+def compute_dashboard(df: pd.DataFrame, filename: str, schema: Optional[dict] = None) -> dict:
     """
     Compute KPIs, chart datasets and anomaly cards for any uploaded CSV.
     The frontend renders these directly — no extra API call needed.
     """
-    num_cols = df.select_dtypes(include="number").columns.tolist()
-    cat_cols = df.select_dtypes(include=["object", "category"]).columns.tolist()
+    schema   = schema or detect_schema(df)
+    num_cols = schema["num_cols"]
+    cat_cols = schema["cat_cols"]
     rows, cols = df.shape
 
     # ── KPI cards (up to 12) ──────────────────────────────────────────────────
@@ -148,25 +339,23 @@ def compute_dashboard(df: pd.DataFrame, filename: str) -> dict:
         })
 
     # fraud/flag column
-    fraud_col = next(
-        (c for c in df.columns if any(k in c.lower() for k in ("fraud", "flag", "risk", "anomaly"))),
-        None
-    )
+    fraud_col = schema["fraud_col"]
+    # overall fraud rate/count from one numpy array, shared by the KPI and anomaly cards
+    overall_fraud = None
     if fraud_col:
         try:
-            rate = float(df[fraud_col].mean()) * 100
-            cnt  = int(df[fraud_col].sum())
+            flags = df[fraud_col].to_numpy(dtype="float64", na_value=np.nan)
+            cnt   = int(np.nansum(flags))
+            rate  = float(np.nanmean(flags)) * 100
+            overall_fraud = rate
             kpis.append({"val": f"{rate:.3f}%", "label": f"{fraud_col} Rate", "icon": "🚨", "color": "#ef4444"})
             kpis.append({"val": f"{cnt:,}",      "label": f"Total {fraud_col}", "icon": "⚠️", "color": "#f97316"})
         except Exception:
             pass
 
     # status/success column
-    status_col = next(
-        (c for c in df.columns if any(k in c.lower() for k in ("status", "success", "result"))),
-        None
-    )
-    if status_col and df[status_col].dtype == object:
+    status_col = schema["status_col"]
+    if status_col and df[status_col].dtype in (object, "category"):
         try:
             vc = df[status_col].value_counts(normalize=True) * 100
             kpis.append({"val": f"{vc.iloc[0]:.1f}%", "label": f"{vc.index[0]} Rate", "icon": "✅", "color": "#10b981"})
@@ -175,23 +364,29 @@ def compute_dashboard(df: pd.DataFrame, filename: str) -> dict:
 
     # ── Numeric distribution histogram (first numeric col) ────────────────────
     num_dist = []
-    primary_num = num_cols[0] if num_cols else None
+    primary_num = schema["primary_num"]
     if primary_num:
         try:
-            counts, edges = np.histogram(df[primary_num].dropna(), bins=10)
+            arr = df[primary_num].to_numpy()
+            if arr.dtype.kind not in "iu":   # floats / nullable ints: drop NaN, NA and ±inf
+                arr = df[primary_num].to_numpy(dtype="float64", na_value=np.nan)
+                arr = arr[np.isfinite(arr)]
+            counts, edges = uniform_histogram(arr, bins=10)
             for cnt, lo, hi in zip(counts, edges[:-1], edges[1:]):
                 lbl = f"{lo:.0f}–{hi:.0f}" if hi < 1e6 else f"{lo/1e3:.0f}K–{hi/1e3:.0f}K"
                 num_dist.append({"range": lbl, "count": int(cnt)})
         except Exception:
             pass
 
-    # ── Category bar charts (top 3 cat cols × primary numeric) ───────────────
-    cat_charts = []
-    for cc in cat_cols[:3]:
+    # ── Category bar charts (top 3 cat cols × primary numeric) + fraud rates ──
+    def cat_aggregates(cc):
+        """Bar chart and fraud-rate Series for one cat column, from one shared grouper."""
+        g = df.groupby(cc, observed=True)
+        chart = rate = None
         try:
             if primary_num:
                 grp = (
-                    df.groupby(cc)[primary_num]
+                    g[primary_num]
                     .agg(["mean", "sum", "count"])
                     .round(2)
                     .reset_index()
@@ -199,44 +394,51 @@ def compute_dashboard(df: pd.DataFrame, filename: str) -> dict:
                     .sort_values("count", ascending=False)
                     .head(10)
                 )
-                cat_charts.append({"col": cc, "num_col": primary_num,
-                                    "data": _safe(grp.to_dict(orient="records"))})
+                chart = {"col": cc, "num_col": primary_num, "data": _records(grp)}
             else:
                 vc = df[cc].value_counts().head(10).reset_index()
                 vc.columns = ["name", "count"]
-                cat_charts.append({"col": cc, "num_col": None,
-                                    "data": _safe(vc.to_dict(orient="records"))})
+                chart = {"col": cc, "num_col": None, "data": _records(vc)}
         except Exception:
             pass
-
-    # ── Fraud rate by category ────────────────────────────────────────────────
-    fraud_by_cat = []
-    if fraud_col:
-        for cc in cat_cols[:2]:
+        if fraud_col:   # shared with fraud_by_cat and the anomaly cards below
             try:
-                grp = (df.groupby(cc)[fraud_col].mean() * 100).sort_values(ascending=False).round(4)
-                fraud_by_cat.append({
-                    "col": cc,
-                    "data": _safe([{"name": k, "rate": float(v)} for k, v in grp.items()])
-                })
+                rate = g[fraud_col].mean() * 100
             except Exception:
                 pass
+        return chart, rate
+
+    # the columns are independent and pandas' group kernels release the GIL — run them side by side
+    workers = min(len(cat_cols[:3]), os.cpu_count() or 1)
+    if workers > 1:
+        with ThreadPoolExecutor(max_workers=workers) as ex:
+            results = list(ex.map(cat_aggregates, cat_cols[:3]))
+    else:
+        results = [cat_aggregates(cc) for cc in cat_cols[:3]]
+    cat_charts  = [chart for chart, _ in results if chart is not None]
+    fraud_rates = {cc: rate for cc, (_, rate) in zip(cat_cols[:3], results) if rate is not None}
+
+    # ── Fraud rate by category ────────────────────────────────────────────────
+    fraud_by_cat = []
+    for cc in cat_cols[:2]:
+        if cc in fraud_rates:
+            grp   = fraud_rates[cc].sort_values(ascending=False).round(4)
+            rates = grp.astype(object).where(grp.notna(), None).tolist()   # Python floats, NaN → None
+            fraud_by_cat.append({
+                "col": cc,
+                "data": [{"name": k, "rate": v} for k, v in zip(grp.index.tolist(), rates)]
+            })
 
     # ── Time series (monthly) ─────────────────────────────────────────────────
     time_series = []
-    date_col = next(
-        (c for c in df.columns if any(k in c.lower() for k in ("date", "time", "timestamp", "month", "period"))),
-        None
-    )
+    date_col = schema["date_col"]
     if date_col and primary_num:
         try:
-            df2 = df.copy()
-            df2["__dt"] = pd.to_datetime(df2[date_col], errors="coerce")
-            df2 = df2.dropna(subset=["__dt"])
-            df2["__p"] = df2["__dt"].dt.to_period("M").astype(str)
-            ts = df2.groupby("__p")[primary_num].sum().reset_index()
-            ts.columns = ["period", "value"]
-            time_series = _safe(ts.to_dict(orient="records"))
+            # group the one numeric column by a month key — no copy of the whole frame
+            period = pd.to_datetime(df[date_col], errors="coerce").dt.to_period("M")
+            mask   = period.notna()
+            ts     = df.loc[mask, primary_num].groupby(period[mask]).sum()
+            time_series = _safe([{"period": str(p), "value": v} for p, v in ts.items()])
         except Exception:
             pass
 
@@ -244,28 +446,23 @@ def compute_dashboard(df: pd.DataFrame, filename: str) -> dict:
     correlations = []
     if len(num_cols) >= 2:
         try:
-            corr = df[num_cols].corr().round(3)
-            pairs, seen = [], set()
-            for c1 in corr.columns:
-                for c2 in corr.columns:
-                    if c1 != c2 and (c2, c1) not in seen:
-                        pairs.append({"col_a": c1, "col_b": c2, "r": float(corr.loc[c1, c2])})
-                        seen.add((c1, c2))
-            pairs.sort(key=lambda x: abs(x["r"]), reverse=True)
-            correlations = pairs[:9]
+            corr = df[num_cols].corr().round(3).to_numpy()
+            i, j = np.triu_indices_from(corr, k=1)          # each unordered pair once
+            vals = corr[i, j]
+            top  = np.argsort(-np.abs(vals), kind="stable")[:9]
+            correlations = [{"col_a": num_cols[i[t]], "col_b": num_cols[j[t]], "r": float(vals[t])}
+                            for t in top]
         except Exception:
             pass
 
     # ── Auto-detected anomaly cards ───────────────────────────────────────────
     anomalies = []
 
-    if fraud_col:
-        overall_fraud = float(df[fraud_col].mean()) * 100
-        for cc in cat_cols[:3]:
+    if overall_fraud:
+        for cc, grp in fraud_rates.items():
             try:
-                grp = df.groupby(cc)[fraud_col].mean() * 100
-                worst = grp.idxmax();  worst_rate = float(grp.max())
-                best  = grp.idxmin();  best_rate  = float(grp.min())
+                worst = grp.idxmax();  worst_rate = float(grp[worst])   # rates read off the argmax/argmin
+                best  = grp.idxmin();  best_rate  = float(grp[best])    # instead of two more scans
                 if worst_rate > overall_fraud * 1.15:
                     pct = (worst_rate - overall_fraud) / overall_fraud * 100
                     anomalies.append({
@@ -283,10 +480,12 @@ def compute_dashboard(df: pd.DataFrame, filename: str) -> dict:
             except Exception:
                 pass
 
-    # Missing-value alerts
-    missing = df.isnull().sum()
-    for col, cnt in missing[missing > rows * 0.05].items():
+    # Missing-value alerts — column by column, so no frame-wide null mask and no scans once full
+    for col in df.columns:
         if len(anomalies) >= 9: break
+        cnt = int(df[col].isna().sum())
+        if cnt <= rows * 0.05:
+            continue
         anomalies.append({
             "title": f"Data Gap: {col}",
             "desc":  f"Column '{col}' is missing {cnt:,} values ({cnt/rows*100:.1f}% of rows). Imputation or exclusion recommended.",
@@ -334,66 +533,173 @@ def compute_dashboard(df: pd.DataFrame, filename: str) -> dict:
 def profile_dataframe(df: pd.DataFrame, filename: str) -> str:
     lines = [f"File: {filename}", f"Shape: {df.shape[0]:,} rows × {df.shape[1]} columns\n"]
     num_cols = df.select_dtypes(include="number").columns.tolist()
+    nulls    = df.isna().sum()   # one null scan, shared by every section below
     if num_cols:
         lines.append("NUMERIC COLUMNS:")
-        desc = df[num_cols].describe().round(2)
-        for col in num_cols:
-            d = desc[col]
-            lines.append(f"  {col}: mean={d['mean']}, min={d['min']}, max={d['max']}, "
-                         f"std={d['std']:.2f}, median={d['50%']}, nulls={int(df[col].isna().sum())}")
+        # one row per column; positional tuples instead of a label lookup per stat
+        desc = df[num_cols].describe().round(2).T[["mean", "min", "max", "std", "50%"]]
+        for col, (mean, mn, mx, std, median) in zip(num_cols, desc.itertuples(index=False, name=None)):
+            lines.append(f"  {col}: mean={mean}, min={mn}, max={mx}, "
+                         f"std={std:.2f}, median={median}, nulls={int(nulls[col])}")
     cat_cols = df.select_dtypes(include=["object", "category"]).columns.tolist()
     if cat_cols:
         lines.append("\nCATEGORICAL COLUMNS:")
         for col in cat_cols:
-            vc = df[col].value_counts()
-            lines.append(f"  {col}: {df[col].nunique()} unique, "
-                         f"nulls={int(df[col].isna().sum())}, top5={dict(vc.head(5))}")
+            vc = df[col].value_counts()   # non-zero entries = non-null unique count
+            lines.append(f"  {col}: {int((vc > 0).sum())} unique, "
+                         f"nulls={int(nulls[col])}, top5={dict(vc.head(5))}")
+    dt_cols = df.select_dtypes(include=["datetime", "datetimetz"]).columns.tolist()
+    if dt_cols:
+        lines.append("\nDATETIME COLUMNS:")
+        for col in dt_cols:
+            lines.append(f"  {col}: {df[col].min()} → {df[col].max()}, nulls={int(nulls[col])}")
     if len(num_cols) >= 2:
-        corr = df[num_cols].corr().round(3)
-        pairs, seen = [], set()
-        for c1 in corr.columns:
-            for c2 in corr.columns:
-                if c1 != c2 and (c2, c1) not in seen:
-                    pairs.append((c1, c2, float(corr.loc[c1, c2]))); seen.add((c1, c2))
-        pairs.sort(key=lambda x: abs(x[2]), reverse=True)
+        corr = df[num_cols].corr().round(3).to_numpy()
+        i, j = np.triu_indices_from(corr, k=1)          # each unordered pair once
+        vals = corr[i, j]
+        top  = np.argsort(-np.abs(vals), kind="stable")[:8]
         lines.append("\nTOP CORRELATIONS:")
-        for a, b, r in pairs[:8]: lines.append(f"  {a} ↔ {b}  r={r}")
+        for t in top: lines.append(f"  {num_cols[i[t]]} ↔ {num_cols[j[t]]}  r={float(vals[t])}")
     lines.append("\nSAMPLE ROWS (first 5):")
     lines.append(df.head(5).to_string(index=False, max_cols=20))
     full = "\n".join(lines)
     return full[:MAX_PROFILE_CHARS] + "\n...[truncated]" if len(full) > MAX_PROFILE_CHARS else full
 
 
-def compute_dynamic_stats(df: pd.DataFrame, question: str) -> str:
-    q, extras = question.lower(), []
-    num_cols = df.select_dtypes(include="number").columns.tolist()
-    cat_cols = df.select_dtypes(include=["object", "category"]).columns.tolist()
+def top_n(s: pd.Series, n: int = 5) -> pd.Series:
+    """Same values as s.nlargest(n) (ties may pick different rows), via an O(N) argpartition."""
+    vals = s.to_numpy(dtype="float64", na_value=np.nan)
+    vals = np.where(np.isnan(vals), -np.inf, vals)       # NaN never ranks
+    k    = min(n, int((vals > -np.inf).sum()))
+    if k == 0:
+        return s.iloc[:0]
+    idx  = np.argpartition(-vals, k - 1)[:k]
+    idx  = idx[np.argsort(-vals[idx], kind="stable")]
+    return s.iloc[idx]
+
+
+def _pl_value_counts(lf, col: str, n: Optional[int] = None):
+    """Polars query + converter mirroring df[col].value_counts().head(n)."""
+    q = (lf.filter(pl.col(col).is_not_null()).group_by(col).len()
+           .sort("len", descending=True, maintain_order=True))
+    q = q.head(n) if n else q
+    return q, lambda f: pd.Series(f["len"].to_list(), index=pd.Index(f[col].to_list(), name=col), name="count")
+
+
+def _pl_groupby_agg(lf, col: str, ncs: list[str]):
+    """Polars query + converter mirroring df.groupby(col)[ncs].agg(["mean","sum","count"]).round(2)."""
+    keys = [(nc, fn) for nc in ncs for fn in ("mean", "sum", "count")]
+    q = (lf.filter(pl.col(col).is_not_null()).group_by(col, maintain_order=True)
+           .agg([getattr(pl.col(nc), fn)().alias(f"__{i}") for i, (nc, fn) in enumerate(keys)]))
+    def to_pandas(f):
+        out = pd.DataFrame({k: f[f"__{i}"].to_list() for i, k in enumerate(keys)},
+                           index=pd.Index(f[col].to_list(), name=col))
+        return out.round(2)
+    return q, to_pandas
+
+
+def _pl_group_mean(lf, cc: str, col: str):
+    """Polars query + converter mirroring df.groupby(cc)[col].mean().sort_values(ascending=False).round(4)."""
+    q = (lf.filter(pl.col(cc).is_not_null()).group_by(cc).agg(pl.col(col).mean())
+           .sort(col, descending=True, nulls_last=True))
+    return q, lambda f: pd.Series(f[col].to_list(), index=pd.Index(f[cc].to_list(), name=cc), name=col).round(4)
+
+
+def _pl_nlargest(lf, nc: str, n: int = 5):
+    """Polars query + converter mirroring df[nc].nlargest(n) (row positions as the index)."""
+    q = lf.select(pl.int_range(pl.len()).alias("__row"), pl.col(nc)).top_k(n, by=nc).sort(nc, descending=True)
+    return q, lambda f: pd.Series(f[nc].to_list(), index=f["__row"].to_list(), name=nc)
+
+
+def compute_dynamic_stats(df: pd.DataFrame, question: str, lf=None,
+                          schema: Optional[dict] = None) -> str:
+    """
+    Question-specific tables appended to the user's message. Each table is planned
+    as a pandas computation plus, when a Polars LazyFrame of the same data is
+    given, an equivalent lazy query; all Polars queries then run in one
+    collect_all() so they are optimized and executed in parallel.
+    `schema` is detect_schema(df), built here if not given.
+    """
+    q = question.lower()
+    schema   = schema or detect_schema(df)
+    num_cols = schema["num_cols"]
+    cat_cols = schema["cat_cols"]
+    lowered  = schema["lowered"]
+    use_pl   = HAS_POLARS and lf is not None
+
+    # (title, pandas thunk, polars (query, converter) — or None to always use the thunk)
+    plan = []
     for col in cat_cols:
-        if col.lower() in q or col.replace("_", " ").lower() in q:
-            for nc in num_cols[:2]:
-                try:
-                    grp = df.groupby(col)[nc].agg(["mean", "sum", "count"]).round(2)
-                    extras.append(f"GroupBy {col}×{nc}:\n{grp.to_string()}")
-                except Exception: pass
-            extras.append(f"Value counts '{col}':\n{df[col].value_counts().head(8).to_string()}")
-            break
-    for col in df.columns:
-        if any(k in col.lower() for k in ("fraud", "risk", "anomaly", "flag")):
-            if col.lower() in q or "fraud" in q or "risk" in q:
-                try:
-                    extras.append(f"'{col}':\n{df[col].value_counts().to_string()}")
-                    for cc in cat_cols[:2]:
-                        grp = df.groupby(cc)[col].mean().sort_values(ascending=False).round(4)
-                        extras.append(f"Fraud by '{cc}':\n{grp.to_string()}")
-                except Exception: pass
+        low = lowered[col]
+        if low in q or low.replace("_", " ") in q:
+            if num_cols:
+                ncs = num_cols[:2]   # one groupby pass for both numeric columns
+                plan.append((f"GroupBy {col}×{'/'.join(ncs)}",
+                             lambda col=col, ncs=ncs: df.groupby(col, observed=True, sort=False)[ncs]
+                                                        .agg(["mean", "sum", "count"]).round(2),
+                             use_pl and _pl_groupby_agg(lf, col, ncs)))
+            plan.append((f"Value counts '{col}'",
+                         lambda col=col: df[col].value_counts().head(8),
+                         use_pl and _pl_value_counts(lf, col, 8)))
             break
+    col = schema["fraud_col"]
+    if col and (lowered[col] in q or "fraud" in q or "risk" in q):
+        plan.append((f"'{col}'", lambda col=col: df[col].value_counts(),
+                     use_pl and _pl_value_counts(lf, col)))
+        fraud_by = schema.get("fraud_by", {})   # precomputed at upload
+        for cc in cat_cols[:2]:
+            if cc in fraud_by:
+                plan.append((f"Fraud by '{cc}'", lambda t=fraud_by[cc]: t, None))
+            else:
+                plan.append((f"Fraud by '{cc}'",
+                             lambda cc=cc, col=col: df.groupby(cc, observed=True)[col].mean()
+                                                      .sort_values(ascending=False).round(4),
+                             use_pl and _pl_group_mean(lf, cc, col)))
     if any(k in q for k in ("top", "highest", "most", "largest")):
         for nc in num_cols[:1]:
-            extras.append(f"Top 5 '{nc}':\n{df[nc].nlargest(5).to_string()}")
+            plan.append((f"Top 5 '{nc}'", lambda nc=nc: top_n(df[nc], 5),
+                         use_pl and _pl_nlargest(lf, nc)))
+
+    tables = None
+    if use_pl and plan:
+        try:
+            frames = iter(pl.collect_all([p[0] for _, _, p in plan if p]))
+            tables = [p[1](next(frames)) if p else run() for _, run, p in plan]
+        except Exception:
+            tables = None   # fall back to pandas for this question
+    if tables is None:
+        tables = []
+        for _, run, _ in plan:
+            try:
+                tables.append(run())
+            except Exception:
+                tables.append(None)
+
+    # rows past this can never survive the MAX_DYNAMIC_CHARS cut — don't render them
+    max_rows = MAX_DYNAMIC_CHARS // 8
+    extras   = [f"{title}:\n{t.head(max_rows).to_string()}" for (title, _, _), t in zip(plan, tables) if t is not None]
     result = "\n\n".join(extras) if extras else ""
     return result[:MAX_DYNAMIC_CHARS] + "\n...[truncated]" if len(result) > MAX_DYNAMIC_CHARS else result
 
 
+def fraud_rate_tables(df: pd.DataFrame, schema: dict) -> dict[str, pd.Series]:
+    """
+    The 'Fraud by <col>' tables compute_dynamic_stats shows whenever a question
+    mentions fraud or risk, computed once at upload. Only the rows that can fit
+    in MAX_DYNAMIC_CHARS are kept.
+    """
+    fraud_col, tables = schema["fraud_col"], {}
+    if fraud_col is None:
+        return tables
+    for cc in schema["cat_cols"][:2]:
+        try:
+            tables[cc] = (df.groupby(cc, observed=True)[fraud_col].mean()
+                            .sort_values(ascending=False).round(4).head(MAX_DYNAMIC_CHARS // 8))
+        except Exception:
+            pass
+    return tables
+
+
 def build_system_prompt_for_csv(df: pd.DataFrame, filename: str) -> str:
     profile = profile_dataframe(df, filename)
     return f"""You are InsightX AI — an elite AI Chief Data Officer for C-suite leadership.
@@ -419,17 +725,21 @@ def get_system_prompt() -> str:
     return _system_prompt if _system_prompt else STATIC_SYSTEM_PROMPT
 
 
-def get_ai_client() -> OpenAI:
+def get_ai_client() -> AsyncOpenAI:
+    """The shared client — created at startup (or on first use) and closed at shutdown."""
+    global _ai_client
     if not API_KEY:
         raise HTTPException(status_code=500, detail="No API key configured. Set NVIDIA_API_KEY or ANTHROPIC_API_KEY in .env")
-    base_url = NVIDIA_BASE_URL if PROVIDER == "nvidia" else ANTHROPIC_BASE_URL
-    return OpenAI(api_key=API_KEY, base_url=base_url)
+    if _ai_client is None:
+        base_url   = NVIDIA_BASE_URL if PROVIDER == "nvidia" else ANTHROPIC_BASE_URL
+        _ai_client = AsyncOpenAI(api_key=API_KEY, base_url=base_url)
+    return _ai_client
 
 
-def call_ai(messages: list[dict]) -> str:
+async def call_ai(messages: list[dict]) -> str:
     client = get_ai_client()
     try:
-        resp = client.chat.completions.create(
+        resp = await client.chat.completions.create(
             model=AI_MODEL, messages=messages, max_tokens=1024, temperature=0.3
         )
         return resp.choices[0].message.content
@@ -437,20 +747,199 @@ def call_ai(messages: list[dict]) -> str:
         raise HTTPException(status_code=502, detail=f"AI API error: {str(e)}")
 
 
+async def stream_ai(messages: list[dict]):
+    """
+    Start a streamed completion and return an async iterator of text deltas.
+    Connection/auth errors surface here as a 502, before any bytes are sent.
+    """
+    client = get_ai_client()
+    try:
+        stream = await client.chat.completions.create(
+            model=AI_MODEL, messages=messages, max_tokens=1024, temperature=0.3, stream=True
+        )
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=f"AI API error: {str(e)}")
+
+    async def deltas():
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+    return deltas()
+
+
+def _messages_key(messages: list[dict]) -> str:
+    return hashlib.blake2b(json_dumps(messages, sort_keys=True), digest_size=16).hexdigest()
+
+
+# filler words dropped before comparing questions — never negations or ranking words
+STOPWORDS = frozenset("""
+    a an the is are was were be been what which who whom whose how of in on for to by with and or
+    from at as about me my our us i we you show tell give please do does did can could would
+    this that these those it its has have had there their
+""".split())
+
+
+# words that make the order of the others matter ("iOS than Android" ≠ "Android than iOS")
+ORDER_WORDS = frozenset({"than", "vs", "versus", "over", "against"})
+
+# direction / comparison words embeddings barely tell apart ("highest" ≈ "lowest");
+# a semantic hit needs the same set of these as the cached question
+CONTRAST_WORDS = ORDER_WORDS | frozenset({
+    "highest", "lowest", "higher", "lower", "most", "least", "more", "less", "top", "bottom",
+    "max", "maximum", "min", "minimum", "best", "worst", "above", "below", "increase", "decrease",
+    "largest", "smallest", "biggest", "fewest", "not", "no", "without", "except",
+})
+
+
+def contrast_words(question: str) -> frozenset:
+    return CONTRAST_WORDS.intersection(re.findall(r"[a-z0-9]+", question.lower()))
+
+
+def canon(question: str) -> str:
+    """
+    Lowercased, punctuation- and stopword-free form of a question; order-insensitive
+    unless it contains a comparison word, in which case word order is kept.
+    """
+    words = [w for w in re.findall(r"[a-z0-9]+", question.lower()) if w not in STOPWORDS]
+    if ORDER_WORDS.intersection(words):
+        return " ".join(dict.fromkeys(words))
+    return " ".join(sorted(set(words)))
+
+
+def _canon_key(context: str, question: str) -> Optional[tuple[str, str]]:
+    """Canonical-tier key, or None when under two content words are left — too little to tell questions apart."""
+    c = canon(question)
+    return (context, c) if " " in c else None
+
+
+@lru_cache(maxsize=1)
+def _reply_embedder():
+    """sentence-transformers model for the semantic reply cache, loaded on first use (None if not installed)."""
+    try:
+        from sentence_transformers import SentenceTransformer
+        return SentenceTransformer(REPLY_CACHE_MODEL)
+    except ImportError:
+        return None
+    except Exception as e:   # weights missing, no network, broken install — run without the semantic tier
+        logging.getLogger(__name__).warning("Reply cache model unavailable (%s); semantic matching off", e)
+        return None
+
+
+def cached_reply(messages: list[dict], question: str) -> tuple[Optional[str], Any]:
+    """
+    Look up a reply for these messages, cheapest tier first:
+      1. exact hash of the whole request
+      2. same context (system prompt + history) and same canonical question
+      3. if sentence-transformers is installed, a question asked in the same
+         context whose embedding is within REPLY_CACHE_SIM and whose
+         contrast words (highest/lowest, than, …) are the same
+    Returns (reply or None, question embedding for store_reply).
+    """
+    reply = _reply_cache.get(_messages_key(messages))
+    if reply is not None:
+        return reply, None
+    context = _messages_key(messages[:-1])
+    key     = _canon_key(context, question)
+    reply   = (_canned.get(key) or _canon_cache.get(key)) if key else None
+    if reply is not None:
+        return reply, None
+    model = _reply_embedder()
+    if model is None:
+        return None, None
+    vec   = model.encode(question, normalize_embeddings=True)
+    words = contrast_words(question)
+    hits  = [(v, r) for v, w, r in _semantic_cache.get(context, []) if w == words]
+    if hits:
+        sims = np.stack([v for v, _ in hits]) @ vec
+        best = int(np.argmax(sims))
+        if sims[best] >= REPLY_CACHE_SIM:
+            return hits[best][1], vec
+    return None, vec
+
+
+def store_reply(messages: list[dict], question: str, vec, reply: str) -> None:
+    context = _messages_key(messages[:-1])
+    for cache, key in ((_reply_cache, _messages_key(messages)), (_canon_cache, _canon_key(context, question))):
+        if key is None:
+            continue
+        cache[key] = reply
+        while len(cache) > MAX_REPLY_CACHE:
+            cache.pop(next(iter(cache)))
+    if vec is not None:
+        _semantic_cache.setdefault(context, []).append((vec, contrast_words(question), reply))
+        while sum(len(v) for v in _semantic_cache.values()) > MAX_REPLY_CACHE:
+            _semantic_cache.pop(next(iter(_semantic_cache)))
+
+
+# same list as the sidebar in src/InsightX_AI.jsx
+SAMPLE_QUERIES = [
+    "What is the highest individual transaction amount?",
+    "Which merchant category has the highest fraud risk?",
+    "What are peak transaction hours?",
+    "Compare fraud rates across different states",
+    "Which bank has the highest max transaction?",
+    "Show me the age group spending patterns",
+    "Give me an executive summary of the dataset",
+    "Compare average transaction amounts for iOS vs Android",
+    "What's the WiFi network fraud anomaly?",
+]
+
+
+def load_canned_replies() -> None:
+    if not CANNED_REPLIES_PATH.exists():
+        return
+    try:
+        rows = json_loads(CANNED_REPLIES_PATH.read_bytes())
+    except (OSError, ValueError):
+        return
+    _canned.update(((context, q), reply) for context, q, reply in rows)
+
+
+async def warm_sample_replies() -> None:
+    """
+    Answer each sample question as the first turn against the static prompt, so
+    clicking one in a fresh session is served from _canned. Replies already on
+    disk are reused; the file is rewritten after each new one, so a restart
+    mid-warm keeps what was already fetched.
+    """
+    system  = [{"role": "system", "content": STATIC_SYSTEM_PROMPT}]
+    context = _messages_key(system)
+    for q in SAMPLE_QUERIES:
+        key = _canon_key(context, q)
+        if key is None or key in _canned:
+            continue
+        try:
+            _canned[key] = await call_ai(system + [{"role": "user", "content": q}])
+        except HTTPException:
+            return   # provider unreachable — these get answered live instead
+        rows = [[c, cq, reply] for (c, cq), reply in _canned.items()]
+        await run_in_threadpool(CANNED_REPLIES_PATH.write_bytes, json_dumps(rows))
+
+
+# chart type → trigger substrings, checked in this order; first match wins
+CHART_KEYWORDS = [
+    ("amountdist",     ("highest", "largest", "maximum", "biggest", "top 10", "distribution", "bucket", "range")),
+    ("hourly",         ("hour", "peak", "time of day")),
+    ("state",          ("state", "region", "maharashtra", "karnataka")),
+    ("category",       ("categor", "merchant", "grocery", "food", "shopping")),
+    ("device_compare", ("device", "ios", "android", "web browser", "compare device")),
+    ("network",        ("network", "4g", "5g", "wifi", "3g")),
+    ("bank",           ("bank", "sbi", "hdfc", "icici", "kotak")),
+    ("daily",          ("day", "week", "monday", "weekend")),
+    ("age",            ("age", "young", "senior", "26-35")),
+    ("txtype",         ("type", "p2p", "p2m", "recharge", "bill")),
+    ("fraud_overview", ("fraud",)),
+    ("category",       ("volume", "summary", "overview")),
+]
+# compiled once at import: one case-insensitive alternation per chart type
+_CHART_PATTERNS = [(name, re.compile("|".join(map(re.escape, kws)), re.IGNORECASE))
+                   for name, kws in CHART_KEYWORDS]
+
+
 def detect_chart_type(query: str) -> Optional[str]:
-    q = query.lower()
-    if any(k in q for k in ("highest","largest","maximum","biggest","top 10","distribution","bucket","range")): return "amountdist"
-    if any(k in q for k in ("hour","peak","time of day")): return "hourly"
-    if any(k in q for k in ("state","region","maharashtra","karnataka")): return "state"
-    if any(k in q for k in ("categor","merchant","grocery","food","shopping")): return "category"
-    if any(k in q for k in ("device","ios","android","web browser","compare device")): return "device_compare"
-    if any(k in q for k in ("network","4g","5g","wifi","3g")): return "network"
-    if any(k in q for k in ("bank","sbi","hdfc","icici","kotak")): return "bank"
-    if any(k in q for k in ("day","week","monday","weekend")): return "daily"
-    if any(k in q for k in ("age","young","senior","26-35")): return "age"
-    if any(k in q for k in ("type","p2p","p2m","recharge","bill")): return "txtype"
-    if "fraud" in q: return "fraud_overview"
-    if any(k in q for k in ("volume","summary","overview")): return "category"
+    for name, pat in _CHART_PATTERNS:
+        if pat.search(query):
+            return name
     return None
 
 
@@ -499,58 +988,165 @@ def get_dashboard():
     Called by the frontend when the Dashboard tab is opened.
     Returns {"csv_loaded": false} when no CSV has been uploaded yet.
     """
+    global _dashboard_json
     if _df is None or _dashboard_cache is None:
         return {"csv_loaded": False}
-    return {"csv_loaded": True, **_dashboard_cache}
+    if _dashboard_json is None:
+        _dashboard_json = json_dumps({"csv_loaded": True, **_dashboard_cache})
+    return Response(_dashboard_json, media_type="application/json")
 
 
-@app.post("/api/chat", response_model=ChatResponse)
-def chat(req: ChatRequest):
-    sid = req.session_id or str(uuid.uuid4())
-    if sid not in sessions:
-        sessions[sid] = []
-    history = sessions[sid]
+def prepare_chat(req: ChatRequest) -> tuple[str, list[dict], list[dict]]:
+    """Session id, its history (with the new user turn appended) and the messages to send."""
+    sid     = req.session_id or str(uuid.uuid4())
+    history = sessions.get(sid) or []   # saved back once the reply is appended
 
     user_content = req.message
     if _df is not None:
-        dynamic = compute_dynamic_stats(_df, req.message)
+        dynamic = compute_dynamic_stats(_df, req.message, _lf, _schema)
         if dynamic:
             user_content = f"{req.message}\n\n[LIVE DATA STATS]\n{dynamic}"
 
-    history.append({"role": "user", "content": user_content})
-    trimmed  = history[-(MAX_HISTORY_TURNS * 2):]
+    # history keeps the question as typed; the stats ride along only on this request's last turn
+    history.append({"role": "user", "content": req.message})
+    trimmed  = history[-(MAX_HISTORY_TURNS * 2):-1] + [{"role": "user", "content": user_content}]
     messages = [{"role": "system", "content": get_system_prompt()}] + trimmed
-    reply    = call_ai(messages)
+    return sid, history, messages
+
+
+@app.post("/api/chat", response_model=ChatResponse)
+async def chat(req: ChatRequest):
+    # pandas stats and the embedding lookup are CPU work — keep them off the event loop
+    sid, history, messages = await run_in_threadpool(prepare_chat, req)
+    reply, vec = await run_in_threadpool(cached_reply, messages, req.message)
+    if reply is None:
+        reply = await call_ai(messages)
+        store_reply(messages, req.message, vec, reply)
     history.append({"role": "assistant", "content": reply})
     sessions[sid] = history
 
     return ChatResponse(reply=reply, session_id=sid, chart_type=detect_chart_type(req.message))
 
 
+@app.post("/api/chat/stream")
+async def chat_stream(req: ChatRequest):
+    """
+    Same as /api/chat, but the reply is streamed as plain text while the model
+    generates it. Session id and chart type are sent in the X-Session-Id and
+    X-Chart-Type headers; the session is updated once the stream completes.
+    """
+    sid, history, messages = await run_in_threadpool(prepare_chat, req)
+    reply, vec = await run_in_threadpool(cached_reply, messages, req.message)
+    deltas = None if reply is not None else await stream_ai(messages)
+
+    async def body():
+        if deltas is None:
+            text = reply
+            yield reply
+        else:
+            parts = []
+            async for d in deltas:
+                parts.append(d)
+                yield d
+            text = "".join(parts)
+            store_reply(messages, req.message, vec, text)
+        history.append({"role": "assistant", "content": text})
+        sessions[sid] = history
+
+    headers = {"X-Session-Id": sid, "X-Chart-Type": detect_chart_type(req.message) or ""}
+    return StreamingResponse(body(), media_type="text/plain; charset=utf-8", headers=headers)
+
+
 @app.get("/api/overview", response_model=OverviewResponse)
-def get_overview():
+async def get_overview():
     sid = str(uuid.uuid4())
     sessions[sid] = []
     question = ("Give me a concise executive overview of this dataset. "
                 "What are the 3-5 most important headlines a CEO should know immediately? "
                 "Highlight key risks, top performers, and strategic opportunities. Be brief.")
     req    = ChatRequest(message=question, session_id=sid)
-    result = chat(req)
+    result = await chat(req)
     return OverviewResponse(overview=result.reply, session_id=sid)
 
 
+def compact_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Convert low-cardinality text columns to 'category' once at upload, so every later
+    value_counts / nunique / groupby runs on integer codes instead of hashing strings,
+    and narrow integer columns to the smallest type that holds their range.
+    """
+    n = max(len(df), 1)
+    for c in df.select_dtypes(include="object").columns:
+        if df[c].nunique(dropna=False) / n < CATEGORY_MAX_RATIO:
+            df[c] = df[c].astype("category")
+    # floats stay float64 — float32 would change the means and stds shown to users and the model
+    for c in df.select_dtypes(include="integer").columns:
+        df[c] = pd.to_numeric(df[c], downcast="integer")
+    return df
+
+
+def to_lazyframe(df: pd.DataFrame):
+    """Polars LazyFrame over df for compute_dynamic_stats, or None without polars/pyarrow."""
+    if not HAS_POLARS:
+        return None
+    try:
+        return pl.from_pandas(df).lazy()
+    except Exception:
+        return None
+
+
+def read_csv_file(f, encoding: str) -> pd.DataFrame:
+    """
+    Parse a binary file object from the start — pyarrow's multithreaded reader when
+    installed, else pandas' C parser. Columns come back as regular numpy/object
+    dtypes (ISO timestamps as datetime64, date-only columns as text).
+    """
+    if HAS_ARROW:
+        try:
+            f.seek(0)
+            tbl = pv.read_csv(f, read_options=pv.ReadOptions(encoding=encoding))
+            # undecodable text comes back as binary columns instead of an error
+            if not any(pa.types.is_binary(t) for t in tbl.schema.types):
+                # date-only columns stay text, as pandas reads them (not datetime.date objects)
+                tbl = tbl.cast(pa.schema([pa.field(fld.name, pa.string()) if pa.types.is_date(fld.type) else fld
+                                          for fld in tbl.schema]))
+                # free each Arrow column as it is converted, and skip block consolidation,
+                # so peak memory stays near one copy of the data
+                return tbl.to_pandas(split_blocks=True, self_destruct=True)
+        except pa.ArrowInvalid:
+            pass   # stricter parsing than pandas — let pandas decide
+    f.seek(0)
+    return pd.read_csv(f, encoding=encoding, low_memory=False)
+
+
+def _file_sha256(f, chunk_size: int = 1 << 20) -> str:
+    f.seek(0)
+    h = hashlib.sha256()
+    for chunk in iter(lambda: f.read(chunk_size), b""):
+        h.update(chunk)
+    return h.hexdigest()
+
+
 @app.post("/api/upload-csv")
 async def upload_csv(file: UploadFile = File(...)):
-    global _df, _df_filename, _system_prompt, _dashboard_cache
+    global _df, _lf, _schema, _df_filename, _system_prompt, _dashboard_cache, _dashboard_json
 
     if not file.filename.endswith(".csv"):
         raise HTTPException(status_code=400, detail="Only .csv files are supported.")
 
-    contents = await file.read()
+    # parse straight from the spooled upload file — the CSV is never held as one bytes object
+    key = (_file_sha256(file.file), file.filename)
+    if key in _upload_cache:
+        _upload_cache[key] = _upload_cache.pop(key)   # mark most recently used
+        _df, _lf, _schema, _system_prompt, _dashboard_cache = _upload_cache[key]
+        _dashboard_json = None
+        _df_filename = file.filename
+        return _upload_response(_df, file.filename)
+
     df = None
     for enc in ("utf-8", "latin-1", "cp1252"):
         try:
-            df = pd.read_csv(io.BytesIO(contents), encoding=enc, low_memory=False)
+            df = read_csv_file(file.file, enc)
             break
         except UnicodeDecodeError:
             continue
@@ -560,14 +1156,27 @@ async def upload_csv(file: UploadFile = File(...)):
     if df is None:
         raise HTTPException(status_code=400, detail="Could not decode CSV.")
 
+    df               = compact_dtypes(df)
     _df              = df
+    _lf              = to_lazyframe(df)
+    _schema          = detect_schema(df)
+    _schema["fraud_by"] = fraud_rate_tables(df, _schema)
     _df_filename     = file.filename
     _system_prompt   = build_system_prompt_for_csv(df, file.filename)
-    _dashboard_cache = compute_dashboard(df, file.filename)   # ← computes everything
+    _dashboard_cache = compute_dashboard(df, file.filename, _schema)   # ← computes everything
+    _dashboard_json  = None
 
+    _upload_cache[key] = (_df, _lf, _schema, _system_prompt, _dashboard_cache)
+    while len(_upload_cache) > MAX_UPLOAD_CACHE:
+        _upload_cache.pop(next(iter(_upload_cache)))
+
+    return _upload_response(df, file.filename)
+
+
+def _upload_response(df: pd.DataFrame, filename: str) -> dict:
     return {
         "message":      "CSV loaded successfully",
-        "filename":     file.filename,
+        "filename":     filename,
         "rows":         df.shape[0],
         "columns":      df.shape[1],
         "column_names": df.columns.tolist(),
@@ -576,19 +1185,15 @@ async def upload_csv(file: UploadFile = File(...)):
 
 @app.get("/api/session/{session_id}")
 def get_session(session_id: str):
-    if session_id not in sessions:
+    history = sessions.get(session_id)
+    if history is None:
         raise HTTPException(status_code=404, detail="Session not found")
-    clean = [
-        {"role": m["role"], "content": m["content"].split("[LIVE DATA STATS]")[0].strip()}
-        for m in sessions[session_id]
-    ]
-    return {"session_id": session_id, "messages": clean}
+    return {"session_id": session_id, "messages": history}
 
 
 @app.delete("/api/session/{session_id}")
 def clear_session(session_id: str):
-    if session_id in sessions:
-        sessions.pop(session_id)
+    sessions.pop(session_id, None)
     return {"message": "Session cleared", "session_id": session_id}
 
 
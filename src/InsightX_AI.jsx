@@ -366,7 +366,7 @@ export default function InsightXApp() {
     setMessages(prev => [...prev, {role:"user",content:userText}]);
     setLoading(true);
     try {
-      const res = await fetch(`${API_BASE}/api/chat`, {
+      const res = await fetch(`${API_BASE}/api/chat/stream`, {
         method:"POST", headers:{"Content-Type":"application/json"},
         body: JSON.stringify({ message:userText, session_id:sessionId }),
       });
@@ -374,10 +374,22 @@ export default function InsightXApp() {
         const err = await res.json().catch(()=>({detail:"Unknown error"}));
         throw new Error(err.detail || `HTTP ${res.status}`);
       }
-      const data = await res.json();
-      if(!sessionId) setSessionId(data.session_id);
+      if(!sessionId) setSessionId(res.headers.get("X-Session-Id"));
+      const chart      = res.headers.get("X-Chart-Type") || null;
       const confidence = computeConfidence(userText);
-      setMessages(prev => [...prev, { role:"assistant", content:data.reply, chart:data.chart_type, confidence }]);
+      // reply text arrives in chunks — the first one adds the assistant message, later ones grow it
+      const reader = res.body.getReader(), decoder = new TextDecoder();
+      let reply = "", started = false;
+      for(;;) {
+        const { done, value } = await reader.read();
+        if(done) break;
+        reply += decoder.decode(value, { stream:true });
+        const content = reply;
+        if(!started) setMessages(prev => [...prev, { role:"assistant", content, chart, confidence }]);
+        else         setMessages(prev => [...prev.slice(0,-1), { ...prev[prev.length-1], content }]);
+        started = true;
+      }
+      if(!started) setMessages(prev => [...prev, { role:"assistant", content:reply, chart, confidence }]);
     } catch(err) {
       setMessages(prev => [...prev, {
         role:"assistant",
@@ -752,7 +764,7 @@ export default function InsightXApp() {
                     </div>
                   </div>
                 ))}
-                {loading && (
+                {loading && messages[messages.length-1]?.role==="user" && (
                   <div style={{ display:"flex", gap:12, marginBottom:20 }}>
                     <div style={{ width:32, height:32, borderRadius:8, background:THEME.gradient, display:"flex", alignItems:"center", justifyContent:"center", color:"#fff", fontSize:13, fontWeight:700 }}>X</div>
                     <div style={{ background:THEME.surface, border:`1px solid ${THEME.border}`, borderRadius:12, padding:"12px 16px", display:"flex", gap:6, alignItems:"center" }}>